@@ -1,12 +1,19 @@
-from typing import List, Dict, Any, Union
+import math
+from typing import List, Dict, Any, Union, Iterator, Tuple, Optional
+
+# Marks an exhausted child iterator in the streaming walks.
+_END = object()
 
 # This is the internal representation for any component in the circuit tree.
 # It can be a single resistor or a group (series/parallel) of other components.
 class Component:
-    def __init__(self, name: str, value: float, comp_type: str = "resistor"):
+    def __init__(self, name: str, value: float, comp_type: str = "resistor",
+                 tcr: float = 0.0, thermal_resistance: float = 0.0):
         self.name = name
         self.value = value          # Ohmic value
         self.type = comp_type       # "resistor", "series", "parallel"
+        self.tcr = tcr              # Temperature coefficient α in 1/K (self-heating solve only)
+        self.thermal_resistance = thermal_resistance  # θ in K/W (self-heating solve only)
         self.voltage = 0.0
         self.current = 0.0
         self.power = 0.0
@@ -26,9 +33,18 @@ class MixedCircuitSolver:
     A class-based solver for mixed circuits to provide better state management
     and a clearer structure for the recursive two-pass calculation.
     """
-    def __init__(self):
+    def __init__(self, record_steps: bool = True):
         self.resistor_id_counter = 1
         self.solution_steps = []
+        # The textual walkthrough grows with the circuit; callers that only need the numbers turn it off.
+        self.record_steps = record_steps
+
+    def build_component_tree(self, structure: Union[Dict, float, int]) -> Component:
+        """
+        Builds the component tree without solving it, e.g. for other solvers
+        that need the same resistor numbering.
+        """
+        return self._build_component_tree(structure)
 
     def _build_component_tree(self, structure: Union[Dict, float, int]) -> Component:
         """
@@ -39,17 +55,34 @@ class MixedCircuitSolver:
             self.resistor_id_counter += 1
             return Component(name, float(structure))
 
+        # A single resistor with optional thermal parameters: {"value": 100, "tcr": 0.004, "thermal_resistance": 50}
+        if isinstance(structure, dict) and "value" in structure and "components" not in structure:
+            name = f"R{self.resistor_id_counter}"
+            self.resistor_id_counter += 1
+            return Component(
+                name,
+                float(structure["value"]),
+                tcr=float(structure.get("tcr") or 0.0),
+                thermal_resistance=float(structure.get("thermal_resistance") or 0.0),
+            )
+
         if isinstance(structure, dict):
             comp_type = structure.get("type")
             if comp_type not in ["series", "parallel"]:
                 raise ValueError(f"Invalid component type: {comp_type}")
 
             children_structures = structure.get("components", [])
+            if not children_structures:
+                raise ValueError(f"Empty {comp_type} group: every group needs at least one component.")
             children = [self._build_component_tree(c) for c in children_structures]
             
-            child_names = [c.name for c in children]
-            name_symbol = '+' if comp_type == "series" else '||'
-            name = f"({name_symbol.join(child_names)})"
+            if self.record_steps:
+                child_names = [c.name for c in children]
+                name_symbol = '+' if comp_type == "series" else '||'
+                name = f"({name_symbol.join(child_names)})"
+            else:
+                # Group names only feed the walkthrough; spelling them out costs O(N·depth) memory.
+                name = comp_type
             
             node = Component(name, 0, comp_type) # Value is a placeholder for now
             node.children = children
@@ -74,7 +107,9 @@ class MixedCircuitSolver:
         if node.type == "parallel":
             sum_of_inverses = sum(1/v for v in child_values if v != 0)
             node.value = 1 / sum_of_inverses if sum_of_inverses != 0 else 0
-            
+            if not self.record_steps:
+                return
+
             step = f"Berechne Ersatzwiderstand für Parallelschaltung: {node.name}\n"
             step += f"   1/R_eq = {' + '.join([f'1/{v:.2f}' for v in child_values])} = {sum_of_inverses:.4f} S\n"
             step += f"   R_eq = {node.value:.2f} Ω"
@@ -82,6 +117,8 @@ class MixedCircuitSolver:
         
         elif node.type == "series":
             node.value = sum(child_values)
+            if not self.record_steps:
+                return
             step = f"Berechne Ersatzwiderstand für Reihenschaltung: {node.name}\n"
             step += f"   R_eq = {' + '.join([f'{v:.2f}' for v in child_values])} Ω = {node.value:.2f} Ω"
             self.solution_steps.append(step)
@@ -109,20 +146,29 @@ class MixedCircuitSolver:
                 child_voltage = current * child.value
                 self._distribute_values(child, child_voltage, current)
 
+    def _iter_flat_resistors(self, node: Component) -> Iterator[Component]:
+        """
+        Lazily walks the tree and yields the base resistors from left to right.
+        Resistors are numbered in this same order while building the tree,
+        so the output is already sorted by name (R1, R2, ...).
+        """
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if not current.children:
+                yield current
+            else:
+                stack.extend(reversed(current.children))
+
     def _get_flat_resistor_list(self, node: Component) -> List[Component]:
         """
         Flattens the tree to get a simple list of all base resistors for the final output.
         """
-        if not node.children:
-            return [node]
-        flat_list = []
-        for child in node.children:
-            flat_list.extend(self._get_flat_resistor_list(child))
-        return flat_list
+        return list(self._iter_flat_resistors(node))
 
-    def solve(self, circuit_structure: Dict[str, Any], total_voltage: float) -> Dict[str, Any]:
+    def _solve_totals(self, circuit_structure: Dict[str, Any], total_voltage: float) -> Tuple[Component, Dict[str, float]]:
         """
-        The main public method to solve the circuit.
+        Runs both passes and returns the solved tree together with the circuit totals.
         """
         # Pass 1: Build tree and calculate total resistance
         self.solution_steps.append("Schritt 1: Vereinfachung der Schaltung (Ersatzwiderstände)")
@@ -142,6 +188,128 @@ class MixedCircuitSolver:
         self.solution_steps.append("\nSchritt 3: Berechnung der Einzelwerte (Spannungen, Ströme, Leistungen)")
         self._distribute_values(root_node, total_voltage, total_current)
 
+        totals = {
+            "total_resistance": total_resistance,
+            "total_current": total_current,
+            "total_power": total_power,
+        }
+        return root_node, totals
+
+    @staticmethod
+    def _leaf_value(structure: Any) -> Optional[float]:
+        """
+        Ohmic value of a base resistor in the input JSON, or None for a group.
+        """
+        if isinstance(structure, (int, float)):
+            return float(structure)
+        if isinstance(structure, dict) and "value" in structure and "components" not in structure:
+            return float(structure["value"])
+        return None
+
+    def _stream_equivalents(self, circuit_structure: Dict[str, Any]) -> Dict[int, float]:
+        """
+        Pass 1 for streaming: validates the input JSON and computes the equivalent
+        resistance of every group in one post-order walk. Only one float per group
+        is kept (keyed by the id of the group's dict); no Component objects are built.
+        """
+        equivalents: Dict[int, float] = {}
+        # Each frame holds a group and an iterator over its children, so the
+        # stack grows with the nesting depth, not with the number of resistors.
+        stack = []
+
+        def enter(structure: Any):
+            if self._leaf_value(structure) is not None:
+                return
+            if not isinstance(structure, dict):
+                raise ValueError(f"Invalid circuit structure provided: {structure}")
+            comp_type = structure.get("type")
+            if comp_type not in ["series", "parallel"]:
+                raise ValueError(f"Invalid component type: {comp_type}")
+            if not structure.get("components"):
+                raise ValueError(f"Empty {comp_type} group: every group needs at least one component.")
+            stack.append((structure, iter(structure["components"])))
+
+        enter(circuit_structure)
+        while stack:
+            group, children = stack[-1]
+            child = next(children, _END)
+            if child is not _END:
+                enter(child)
+                continue
+            stack.pop()
+            child_values = (self._child_value(c, equivalents) for c in group["components"])
+            if group["type"] == "parallel":
+                sum_of_inverses = sum(1/v for v in child_values if v != 0)
+                equivalents[id(group)] = 1 / sum_of_inverses if sum_of_inverses != 0 else 0
+            else:
+                equivalents[id(group)] = sum(child_values)
+        return equivalents
+
+    def _child_value(self, structure: Any, equivalents: Dict[int, float]) -> float:
+        value = self._leaf_value(structure)
+        return value if value is not None else equivalents[id(structure)]
+
+    def _iter_stream_results(self, circuit_structure: Dict[str, Any], equivalents: Dict[int, float],
+                             total_voltage: float, total_current: float) -> Iterator[Dict[str, Any]]:
+        """
+        Pass 2 for streaming: distributes voltage and current in a depth-first walk
+        and yields each base resistor as soon as it is reached (R1, R2, ... in order).
+        """
+        def result(value: float, voltage: float, current: float) -> Dict[str, Any]:
+            name = f"R{self.resistor_id_counter}"
+            self.resistor_id_counter += 1
+            return {"resistor": name, "resistance": value, "voltage": voltage, "current": current, "power": voltage * current}
+
+        root_value = self._leaf_value(circuit_structure)
+        if root_value is not None:
+            yield result(root_value, total_voltage, total_current)
+            return
+
+        stack = [(circuit_structure, iter(circuit_structure["components"]), total_voltage, total_current)]
+        while stack:
+            group, children, voltage, current = stack[-1]
+            child = next(children, _END)
+            if child is _END:
+                stack.pop()
+                continue
+            value = self._child_value(child, equivalents)
+            if group["type"] == "parallel":
+                # Voltage is the same for all children in a parallel group
+                child_voltage, child_current = voltage, (voltage / value if value != 0 else 0)
+            else:
+                # Current is the same for all children in a series group
+                child_voltage, child_current = current * value, current
+            if self._leaf_value(child) is not None:
+                yield result(value, child_voltage, child_current)
+            else:
+                stack.append((child, iter(child["components"]), child_voltage, child_current))
+
+    def solve_stream(self, circuit_structure: Dict[str, Any], total_voltage: float) -> Tuple[Dict[str, float], Iterator[Dict[str, Any]]]:
+        """
+        Streaming variant of solve(): returns the totals right away and a generator
+        that produces the per-resistor results in order (R1, R2, ...). It works
+        directly on the input JSON instead of building the component tree.
+
+        Memory beyond the parsed input is one float per group plus a stack as deep
+        as the nesting, so the input itself (O(N)) remains the floor; the results,
+        the per-resistor objects and the solution text are never materialized.
+        """
+        equivalents = self._stream_equivalents(circuit_structure)
+        total_resistance = self._child_value(circuit_structure, equivalents)
+        total_current = total_voltage / total_resistance if total_resistance != 0 else 0
+        totals = {
+            "total_resistance": total_resistance,
+            "total_current": total_current,
+            "total_power": total_voltage * total_current,
+        }
+        return totals, self._iter_stream_results(circuit_structure, equivalents, total_voltage, total_current)
+
+    def solve(self, circuit_structure: Dict[str, Any], total_voltage: float) -> Dict[str, Any]:
+        """
+        The main public method to solve the circuit.
+        """
+        root_node, totals = self._solve_totals(circuit_structure, total_voltage)
+
         # Get the final list of individual resistor results
         individual_results_components = self._get_flat_resistor_list(root_node)
         individual_results_components.sort(key=lambda c: int(c.name.replace("R", "")))
@@ -156,9 +324,7 @@ class MixedCircuitSolver:
             self.solution_steps.append(step)
 
         return {
-            "total_resistance": total_resistance,
-            "total_current": total_current,
-            "total_power": total_power,
+            **totals,
             "individual_results": individual_results_dicts,
             "solution": "\n\n".join(self.solution_steps)
         }
@@ -168,6 +334,269 @@ def solve_mixed_circuit(circuit_structure: Dict[str, Any], total_voltage: float)
     solver = MixedCircuitSolver()
     return solver.solve(circuit_structure, total_voltage)
 
+# Wrapper for the streaming endpoint; no component tree and no solution walkthrough are built.
+def stream_mixed_circuit(circuit_structure: Dict[str, Any], total_voltage: float) -> Tuple[Dict[str, float], Iterator[Dict[str, Any]]]:
+    solver = MixedCircuitSolver(record_steps=False)
+    return solver.solve_stream(circuit_structure, total_voltage)
+
+
+class SelfHeatingCircuitSolver:
+    """
+    Solves a mixed circuit whose resistors heat up with the power they dissipate:
+        R(T) = R0 * (1 + α * ΔT),  ΔT = θ * P
+    The resistances are the fixed point of "solve the circuit, update R from P".
+    The component tree is compiled once into flat lists (post-order) so each
+    iteration is a pair of linear sweeps, and the fixed-point iteration is
+    accelerated with Anderson mixing over the last few iterates.
+    """
+    # Consecutive iterations with a growing residual that count as runaway.
+    RUNAWAY_ITERATIONS = 5
+
+    def __init__(self, tolerance: float = 1e-9, max_iterations: int = 100, history_size: int = 3):
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.history_size = history_size
+
+    def _compile(self, root: Component):
+        """
+        Flattens the tree into post-order node lists. Leaves keep the R1, R2, ... order.
+        """
+        self.node_types: List[str] = []
+        self.node_children: List[List[int]] = []
+        self.node_leaf: List[int] = []      # leaf index for resistors, -1 for groups
+        self.leaves: List[Component] = []
+
+        # Iterative post-order traversal: children get their node index before their parent.
+        stack = [(root, False)]
+        child_indices: List[List[int]] = [[]]
+        while stack:
+            node, expanded = stack.pop()
+            if node.children and not expanded:
+                stack.append((node, True))
+                child_indices.append([])
+                for child in reversed(node.children):
+                    stack.append((child, False))
+                continue
+            index = len(self.node_types)
+            self.node_types.append(node.type)
+            if node.children:
+                self.node_children.append(child_indices.pop())
+                self.node_leaf.append(-1)
+            else:
+                self.node_children.append([])
+                self.node_leaf.append(len(self.leaves))
+                self.leaves.append(node)
+            child_indices[-1].append(index)
+
+        self.nominal = [leaf.value for leaf in self.leaves]
+        # R0 * α * θ: how strongly each resistor reacts to its own power.
+        self.coupling = [leaf.value * leaf.tcr * leaf.thermal_resistance for leaf in self.leaves]
+
+    def _evaluate(self, resistances: List[float], total_voltage: float):
+        """
+        One equivalent-resistance pass (post-order) and one distribution pass
+        (reverse post-order) for the given leaf resistances.
+        """
+        count = len(self.node_types)
+        values = [0.0] * count
+        for i in range(count):
+            leaf = self.node_leaf[i]
+            if leaf >= 0:
+                values[i] = resistances[leaf]
+            elif self.node_types[i] == "parallel":
+                sum_of_inverses = sum(1 / values[c] for c in self.node_children[i] if values[c] != 0)
+                values[i] = 1 / sum_of_inverses if sum_of_inverses != 0 else 0
+            else:
+                values[i] = sum(values[c] for c in self.node_children[i])
+
+        total_resistance = values[-1]
+        total_current = total_voltage / total_resistance if total_resistance != 0 else 0
+
+        voltages = [0.0] * count
+        currents = [0.0] * count
+        voltages[-1] = total_voltage
+        currents[-1] = total_current
+        for i in range(count - 1, -1, -1):
+            if self.node_leaf[i] >= 0:
+                continue
+            if self.node_types[i] == "parallel":
+                for c in self.node_children[i]:
+                    voltages[c] = voltages[i]
+                    currents[c] = voltages[i] / values[c] if values[c] != 0 else 0
+            else:
+                for c in self.node_children[i]:
+                    currents[c] = currents[i]
+                    voltages[c] = currents[i] * values[c]
+
+        leaf_voltages = [0.0] * len(self.leaves)
+        leaf_currents = [0.0] * len(self.leaves)
+        for i, leaf in enumerate(self.node_leaf):
+            if leaf >= 0:
+                leaf_voltages[leaf] = voltages[i]
+                leaf_currents[leaf] = currents[i]
+        return total_resistance, total_current, leaf_voltages, leaf_currents
+
+    def _is_physical(self, resistances: List[float]) -> bool:
+        """
+        Resistances must stay finite and positive; resistors given as 0 Ω stay at 0 Ω.
+        """
+        return all(math.isfinite(r) and (r > 0 or r0 <= 0) for r, r0 in zip(resistances, self.nominal))
+
+    def _heated(self, leaf_voltages: List[float], leaf_currents: List[float]) -> List[float]:
+        return [r0 + k * u * i for r0, k, u, i in zip(self.nominal, self.coupling, leaf_voltages, leaf_currents)]
+
+    def _anderson_step(self, g_history: List[List[float]], f_history: List[List[float]]) -> Optional[List[float]]:
+        """
+        Anderson mixing: combine the last iterates so that the combined residual is
+        minimal in the least-squares sense. Returns None if the history is degenerate.
+        """
+        m = len(f_history) - 1
+        f_last, g_last = f_history[-1], g_history[-1]
+        d_f = [[a - b for a, b in zip(f_history[j + 1], f_history[j])] for j in range(m)]
+        d_g = [[a - b for a, b in zip(g_history[j + 1], g_history[j])] for j in range(m)]
+
+        # Normal equations (ΔFᵀΔF) γ = ΔFᵀ f, solved by Gaussian elimination (m is tiny).
+        matrix = [[sum(a * b for a, b in zip(d_f[r], d_f[c])) for c in range(m)] + [sum(a * b for a, b in zip(d_f[r], f_last))] for r in range(m)]
+        for col in range(m):
+            pivot = max(range(col, m), key=lambda r: abs(matrix[r][col]))
+            if abs(matrix[pivot][col]) < 1e-300:
+                return None
+            matrix[col], matrix[pivot] = matrix[pivot], matrix[col]
+            for r in range(col + 1, m):
+                factor = matrix[r][col] / matrix[col][col]
+                for c in range(col, m + 1):
+                    matrix[r][c] -= factor * matrix[col][c]
+        gamma = [0.0] * m
+        for r in range(m - 1, -1, -1):
+            gamma[r] = (matrix[r][m] - sum(matrix[r][c] * gamma[c] for c in range(r + 1, m))) / matrix[r][r]
+
+        mixed = list(g_last)
+        for j in range(m):
+            if gamma[j]:
+                mixed = [x - gamma[j] * d for x, d in zip(mixed, d_g[j])]
+        if not self._is_physical(mixed):
+            return None
+        return mixed
+
+    def _iterate(self, total_voltage: float, start: List[float]) -> Dict[str, Any]:
+        next_resistances = list(start)
+        g_history: List[List[float]] = []
+        f_history: List[List[float]] = []
+        telemetry = []
+        converged = False
+        runaway = False
+        growing = 0
+
+        for iteration in range(1, self.max_iterations + 1):
+            resistances = next_resistances
+            total_resistance, total_current, leaf_voltages, leaf_currents = self._evaluate(resistances, total_voltage)
+            heated = self._heated(leaf_voltages, leaf_currents)
+            residual = [g - r for g, r in zip(heated, resistances)]
+            # Relative per resistor, so a 1 mΩ resistor next to a 1 kΩ one is held to the same tolerance.
+            max_residual = max((abs(f) / max(abs(g), 1e-300) for f, g in zip(residual, heated)), default=0.0)
+            telemetry.append({
+                "iteration": iteration,
+                "total_resistance": total_resistance,
+                "total_current": total_current,
+                "max_residual": max_residual,
+            })
+            if max_residual <= self.tolerance:
+                converged = True
+                break
+            # Thermal runaway: the update leaves the physical range (typically NTC
+            # resistors heating without bound) or keeps moving further away.
+            growing = growing + 1 if len(telemetry) > 1 and max_residual > telemetry[-2]["max_residual"] else 0
+            if not self._is_physical(heated) or growing >= self.RUNAWAY_ITERATIONS:
+                runaway = True
+                break
+
+            g_history.append(heated)
+            f_history.append(residual)
+            if len(f_history) > self.history_size + 1:
+                g_history.pop(0)
+                f_history.pop(0)
+            accelerated = self._anderson_step(g_history, f_history) if len(f_history) > 1 else None
+            next_resistances = accelerated if accelerated is not None else heated
+
+        # Always the last evaluated iterate, i.e. the one described by the final telemetry entry.
+        return {
+            "resistances": resistances,
+            "total_resistance": total_resistance,
+            "total_current": total_current,
+            "leaf_voltages": leaf_voltages,
+            "leaf_currents": leaf_currents,
+            "converged": converged,
+            "runaway": runaway,
+            "iterations": len(telemetry),
+            "telemetry": telemetry,
+        }
+
+    def _format_result(self, total_voltage: float, state: Dict[str, Any]) -> Dict[str, Any]:
+        individual_results = []
+        for leaf, resistance, voltage, current in zip(self.leaves, state["resistances"], state["leaf_voltages"], state["leaf_currents"]):
+            power = voltage * current
+            individual_results.append({
+                "resistor": leaf.name,
+                "resistance": resistance,
+                "nominal_resistance": leaf.value,
+                "temperature_rise": leaf.thermal_resistance * power,
+                "voltage": voltage,
+                "current": current,
+                "power": power,
+            })
+
+        total_resistance = state["total_resistance"]
+        total_current = state["total_current"]
+        total_power = total_voltage * total_current
+        if state["converged"]:
+            status = "konvergiert"
+        elif state["runaway"]:
+            status = "thermisches Durchgehen (kein stabiler Arbeitspunkt), letzter physikalischer Zustand"
+        else:
+            status = "nicht konvergiert"
+        solution_steps = [
+            "Selbsterwärmung: R = R0 * (1 + α * θ * P), iterativ gelöst",
+            f"Ergebnis {status} nach {state['iterations']} Iterationen (Toleranz {self.tolerance:g})",
+            f"Gesamtwiderstand (warm): Rg = {total_resistance:.2f} Ω",
+            f"Gesamtstrom (Ig) = Ug / Rg = {total_voltage:.2f}V / {total_resistance:.2f}Ω = {total_current:.4f}A",
+            f"Gesamtleistung (Pg) = Ug * Ig = {total_voltage:.2f}V * {total_current:.4f}A = {total_power:.2f}W",
+        ]
+        return {
+            "total_voltage": total_voltage,
+            "total_resistance": total_resistance,
+            "total_current": total_current,
+            "total_power": total_power,
+            "converged": state["converged"],
+            "runaway": state["runaway"],
+            "iterations": state["iterations"],
+            "telemetry": state["telemetry"],
+            "individual_results": individual_results,
+            "solution": "\n\n".join(solution_steps),
+        }
+
+    def solve(self, circuit_structure: Dict[str, Any], total_voltages: List[float]) -> List[Dict[str, Any]]:
+        """
+        Solves the self-heating circuit for each voltage. The tree is compiled once
+        and every sweep point starts from the previous point's resistances.
+        """
+        root_node = MixedCircuitSolver(record_steps=False).build_component_tree(circuit_structure)
+        self._compile(root_node)
+
+        results = []
+        start = self.nominal
+        for total_voltage in total_voltages:
+            state = self._iterate(total_voltage, start)
+            if state["converged"]:
+                start = state["resistances"]
+            results.append(self._format_result(total_voltage, state))
+        return results
+
+# Wrapper function to be called by the API
+def solve_self_heating_circuit(circuit_structure: Dict[str, Any], total_voltages: List[float],
+                               tolerance: float = 1e-9, max_iterations: int = 100) -> List[Dict[str, Any]]:
+    solver = SelfHeatingCircuitSolver(tolerance=tolerance, max_iterations=max_iterations)
+    return solver.solve(circuit_structure, total_voltages)
+
 
 # --- The simple series and parallel functions remain unchanged ---
 
@@ -1,14 +1,45 @@
+import csv
+import io
+import json
+import logging
+import os
+import sqlite3
+from contextlib import asynccontextmanager
+from itertools import islice
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Union
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Dict, Any, Union, Iterator, Optional, Annotated, Callable
+
+from circuit_solver import solve_series_circuit, solve_parallel_circuit, solve_mixed_circuit, stream_mixed_circuit, solve_self_heating_circuit
+from solve_cache import SolveCache, circuit_hash
+
+# --- Shared solve cache (one SQLite file for all workers) ---
+CACHE_PATH = os.environ.get("CIRCUIT_CACHE_PATH", "solve_cache.sqlite3")
+CACHE_MAX_BYTES = int(os.environ.get("CIRCUIT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# JSON list of /api/solve payloads that are solved at startup (see README.md for refreshing it).
+CACHE_SEED_PATH = os.environ.get("CIRCUIT_CACHE_SEED", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_seed.json"))
+# Part of every cache key. Bump it whenever the solver output changes; rows of
+# other versions are deleted when the workers start.
+CACHE_VERSION = "2.0.0-1"
 
-from circuit_solver import solve_series_circuit, solve_parallel_circuit, solve_mixed_circuit
+solve_cache = SolveCache(CACHE_PATH, CACHE_MAX_BYTES, version=CACHE_VERSION)
+logger = logging.getLogger("uvicorn.error")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _warm_cache()
+    solve_cache.start_flusher()
+    yield
+    solve_cache.close()
 
 app = FastAPI(
     title="CircuitSolver API",
     description="An API for calculating series, parallel, and mixed electrical circuits.",
     version="2.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware to allow requests from the frontend
@@ -27,10 +58,17 @@ app.add_middleware(
 
 # --- Pydantic Models for Input Validation ---
 
+# A single resistor with optional thermal parameters for the self-heating solve.
+# Outside of /api/solve/thermal only the nominal value is used.
+class ThermalResistor(BaseModel):
+    value: float = Field(..., description="Nominal resistance R0 in Ω.")
+    tcr: float = Field(0.0, description="Temperature coefficient α in 1/K.")
+    thermal_resistance: float = Field(0.0, ge=0, description="Thermal resistance θ in K/W.")
+
 # A model for the recursive structure of a mixed circuit
 class MixedCircuit(BaseModel):
     type: str  # "series" or "parallel"
-    components: List[Union['MixedCircuit', float, int]]
+    components: List[Union['MixedCircuit', ThermalResistor, float, int]] = Field(..., min_length=1)
 
 class CircuitPayload(BaseModel):
     circuit_type: str = Field(..., description="Type of circuit: 'series', 'parallel', or 'mixed'.")
@@ -38,6 +76,20 @@ class CircuitPayload(BaseModel):
     circuit: Union[List[float], MixedCircuit]
     total_voltage: float = Field(..., gt=0, description="The total voltage applied to the circuit.")
 
+class ThermalCircuitPayload(BaseModel):
+    circuit_type: str = Field(..., description="Type of circuit: 'series', 'parallel', or 'mixed'.")
+    circuit: Union[List[Union[ThermalResistor, float]], MixedCircuit]
+    total_voltage: Optional[float] = Field(None, gt=0, description="The total voltage applied to the circuit. Not needed if sweep_voltages is set.")
+    sweep_voltages: Optional[List[Annotated[float, Field(gt=0)]]] = Field(None, description="Optional list of voltages to solve in one batch instead of total_voltage.")
+    tolerance: float = Field(1e-9, gt=0, description="Relative convergence tolerance for the resistances.")
+    max_iterations: int = Field(100, ge=1, le=10000, description="Maximum number of fixed-point iterations per voltage.")
+
+    @model_validator(mode="after")
+    def check_voltage(self):
+        if self.total_voltage is None and not self.sweep_voltages:
+            raise ValueError("Either 'total_voltage' or 'sweep_voltages' must be given.")
+        return self
+
 @app.post("/api/solve", summary="Solve an Electrical Circuit")
 def solve_circuit(payload: CircuitPayload) -> Dict[str, Any]:
     """
@@ -50,30 +102,199 @@ def solve_circuit(payload: CircuitPayload) -> Dict[str, Any]:
         - For "mixed": A nested dictionary describing the topology.
           Example: `{"type": "series", "components": [10, {"type": "parallel", "components": [20, 50]}]}`
     - **total_voltage**: The total voltage of the circuit.
+
+    Results are cached across workers and restarts, keyed by a hash of the request.
+    """
+    cache_payload = _cache_payload(payload)
+    key = circuit_hash(cache_payload, CACHE_VERSION)
+    cached = solve_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = _solve_payload(payload)
+    if "error" not in result:
+        solve_cache.put(key, cache_payload, result)
+    return result
+
+def _cache_payload(payload: CircuitPayload) -> Dict[str, Any]:
+    cache_payload = payload.model_dump()
+    cache_payload["circuit_type"] = payload.circuit_type.lower()
+    return cache_payload
+
+def _solve_by_type(payload: Union[CircuitPayload, ThermalCircuitPayload],
+                   solve_flat: Callable[[str, List[Any]], Any],
+                   solve_mixed: Callable[[Dict[str, Any]], Any]) -> Any:
+    """
+    Dispatches on circuit_type: series/parallel lists go to solve_flat(circuit_type, resistors),
+    mixed circuits to solve_mixed(circuit_dict). Invalid input raises ValueError with the
+    message for the {"error": ...} response, which every endpoint returns the same way.
     """
     circuit_type = payload.circuit_type.lower()
-    
-    if circuit_type == "series":
-        if not isinstance(payload.circuit, list):
-            return {"error": "For series circuits, 'circuit' must be a list of resistor values."}
-        resistor_values = [float(r) for r in payload.circuit]
-        return solve_series_circuit(resistor_values, payload.total_voltage)
-        
-    elif circuit_type == "parallel":
+
+    if circuit_type in ("series", "parallel"):
         if not isinstance(payload.circuit, list):
-            return {"error": "For parallel circuits, 'circuit' must be a list of resistor values."}
-        resistor_values = [float(r) for r in payload.circuit]
-        return solve_parallel_circuit(resistor_values, payload.total_voltage)
-        
+            raise ValueError(f"For {circuit_type} circuits, 'circuit' must be a list of resistor values.")
+        resistors = [r.model_dump() if isinstance(r, ThermalResistor) else float(r) for r in payload.circuit]
+        return solve_flat(circuit_type, resistors)
+
     elif circuit_type == "mixed":
         if not isinstance(payload.circuit, MixedCircuit):
-             return {"error": "For mixed circuits, 'circuit' must be a valid JSON object."}
+            raise ValueError("For mixed circuits, 'circuit' must be a valid JSON object.")
         # Pydantic has already parsed it into MixedCircuit, we can convert it back to a dict for the solver
-        circuit_dict = payload.circuit.model_dump()
-        return solve_mixed_circuit(circuit_dict, payload.total_voltage)
-        
+        return solve_mixed(payload.circuit.model_dump())
+
     else:
-        return {"error": f"Invalid circuit type '{payload.circuit_type}'. Use 'series', 'parallel', or 'mixed'."}
+        raise ValueError(f"Invalid circuit type '{payload.circuit_type}'. Use 'series', 'parallel', or 'mixed'.")
+
+def _as_mixed(solve_mixed: Callable[[Dict[str, Any]], Any]) -> Callable[[str, List[Any]], Any]:
+    # A flat series/parallel circuit is a single-level mixed circuit with the same resistor numbering.
+    return lambda circuit_type, resistors: solve_mixed({"type": circuit_type, "components": resistors})
+
+def _solve_payload(payload: CircuitPayload) -> Dict[str, Any]:
+    flat_solvers = {"series": solve_series_circuit, "parallel": solve_parallel_circuit}
+    try:
+        return _solve_by_type(
+            payload,
+            lambda circuit_type, resistors: flat_solvers[circuit_type](resistors, payload.total_voltage),
+            lambda circuit_dict: solve_mixed_circuit(circuit_dict, payload.total_voltage),
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+
+def _warm_cache():
+    """
+    Solves the seed circuits that are not cached yet, so the first requests after
+    a deploy are already hits. Every worker runs this; the ones starting later
+    find the entries already stored by the others.
+    """
+    # A broken seed file or entry must never keep the workers from starting.
+    if not os.path.exists(CACHE_SEED_PATH):
+        return
+    try:
+        with open(CACHE_SEED_PATH, encoding="utf-8") as f:
+            seeds = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring cache seed file %s: %s", CACHE_SEED_PATH, e)
+        return
+    if not isinstance(seeds, list):
+        logger.warning("Ignoring cache seed file %s: expected a JSON list", CACHE_SEED_PATH)
+        return
+
+    skipped = 0
+    for seed in seeds:
+        try:
+            payload = CircuitPayload(**seed)
+            cache_payload = _cache_payload(payload)
+            key = circuit_hash(cache_payload, CACHE_VERSION)
+            if solve_cache.contains(key):
+                continue
+            result = _solve_payload(payload)
+        except (TypeError, ValueError, ArithmeticError, RecursionError, sqlite3.Error):
+            skipped += 1  # Entries that no longer match the API or the solver.
+            continue
+        if "error" not in result:
+            solve_cache.put(key, cache_payload, result)
+    if skipped:
+        logger.warning("Skipped %d invalid entries in cache seed file %s", skipped, CACHE_SEED_PATH)
+
+@app.post("/api/solve/thermal", summary="Solve a Circuit with Self-Heating Resistors")
+def solve_circuit_thermal(payload: ThermalCircuitPayload) -> Dict[str, Any]:
+    """
+    Solves a circuit whose resistances follow their dissipated power:
+    R = R0 * (1 + α * θ * P). The circuit is solved repeatedly until the
+    resistances converge.
+
+    - **circuit**: Like `/api/solve`, but every resistor may also be given as
+      `{"value": 100, "tcr": 0.004, "thermal_resistance": 50}`.
+    - **total_voltage**: The voltage for a single solve.
+    - **sweep_voltages**: Optional list of voltages, used instead of `total_voltage`.
+      If set, the response is `{"sweep": [...]}` with one result per voltage.
+    - **tolerance** / **max_iterations**: Convergence settings. Each result
+      reports `converged`, `iterations` and per-iteration `telemetry`. If the
+      resistors heat up without a stable operating point, `runaway` is true and
+      the values are those of the last physical iterate.
+    """
+    voltages = payload.sweep_voltages if payload.sweep_voltages else [payload.total_voltage]
+    solve_mixed = lambda circuit_dict: solve_self_heating_circuit(circuit_dict, voltages, payload.tolerance, payload.max_iterations)
+    try:
+        results = _solve_by_type(payload, _as_mixed(solve_mixed), solve_mixed)
+    except ValueError as e:
+        return {"error": str(e)}
+    if payload.sweep_voltages:
+        return {"sweep": results}
+    return results[0]
+
+# --- Streaming output for very large circuits ---
+
+# Number of resistor records encoded into one chunk of the streamed body.
+STREAM_CHUNK_SIZE = 1000
+RESULT_FIELDS = ["resistor", "resistance", "voltage", "current", "power"]
+
+def _iter_chunks(records: Iterator[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+    while True:
+        chunk = list(islice(records, STREAM_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+def _encode_ndjson(totals: Dict[str, float], records: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    yield json.dumps(totals) + "\n"
+    for chunk in _iter_chunks(records):
+        yield "".join(json.dumps(record) + "\n" for record in chunk)
+
+def _encode_csv(totals: Dict[str, float], records: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    # The totals row shares the resistor columns: resistance = Rg, voltage = Ug, current = Ig, power = Pg.
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=RESULT_FIELDS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerow({
+        "resistor": "total",
+        "resistance": totals["total_resistance"],
+        "voltage": totals["total_voltage"],
+        "current": totals["total_current"],
+        "power": totals["total_power"],
+    })
+    yield buffer.getvalue()
+    for chunk in _iter_chunks(records):
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+
+STREAM_FORMATS = {
+    "ndjson": (_encode_ndjson, "application/x-ndjson"),
+    "csv": (_encode_csv, "text/csv"),
+}
+
+@app.post("/api/solve/stream", summary="Solve an Electrical Circuit (streamed)", response_model=None)
+def solve_circuit_stream(payload: CircuitPayload, format: str = "ndjson") -> Union[StreamingResponse, Dict[str, Any]]:
+    """
+    Same calculation as `/api/solve`, but the results are streamed while they are
+    produced instead of being collected into one JSON document. Meant for circuits
+    with a very large number of resistors; the step-by-step solution text is omitted.
+
+    - **format**: "ndjson" (default) or "csv".
+        - NDJSON: the first line holds the totals (`total_resistance`, `total_current`,
+          `total_power`, `total_voltage`), every following line is one resistor.
+        - CSV: after the column header, a row with `resistor` = "total" holds the
+          circuit totals, followed by one row per resistor.
+
+    Invalid input is reported like in `/api/solve`, as a JSON `{"error": ...}` object.
+    """
+    stream_format = format.lower()
+    if stream_format not in STREAM_FORMATS:
+        return {"error": f"Invalid format '{format}'. Use 'ndjson' or 'csv'."}
+
+    # The input is fully validated here, before the first byte is streamed.
+    solve_mixed = lambda circuit_dict: stream_mixed_circuit(circuit_dict, payload.total_voltage)
+    try:
+        totals, records = _solve_by_type(payload, _as_mixed(solve_mixed), solve_mixed)
+    except ValueError as e:
+        return {"error": str(e)}
+    totals["total_voltage"] = payload.total_voltage
+
+    encoder, media_type = STREAM_FORMATS[stream_format]
+    return StreamingResponse(encoder(totals, records), media_type=media_type)
 
 @app.get("/", summary="Root Endpoint")
 def read_root():
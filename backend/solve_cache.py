@@ -0,0 +1,258 @@
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Persistent result store shared by all uvicorn workers on the same machine.
+# SQLite in WAL mode lets every worker read concurrently while one writes,
+# and the file survives restarts, so popular circuits stay solved.
+
+def _canonical(value: Any) -> Any:
+    """
+    Normalizes a payload so that equivalent circuits produce the same key
+    (10 and 10.0 are the same resistor, dict key order does not matter).
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+def circuit_hash(payload: Dict[str, Any], version: str = "") -> str:
+    """
+    SHA-256 over the canonical JSON form of a solve request. The cache version
+    is part of the key, so results of an older solver are never served.
+    """
+    keyed = {"version": version, "payload": _canonical(payload)}
+    canonical = json.dumps(keyed, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SolveCache:
+    """
+    A size-bounded SQLite cache for solve results. Entries are evicted in
+    least-recently-used order once the stored rows exceed max_bytes.
+    """
+    # Hits are counted in memory and written by a background thread, so the read
+    # path never writes and never waits for SQLite's single writer lock.
+    FLUSH_SECONDS = 5.0
+    # Busy timeout (ms) for best-effort hit flushes; a locked database just defers them.
+    FLUSH_BUSY_TIMEOUT = 50
+    # Eviction trims the store to this fraction of max_bytes so it does not run on every insert.
+    EVICT_TARGET = 0.9
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, version: Optional[str] = None):
+        """
+        With a version set, rows stored by other versions are deleted on startup;
+        without one (e.g. for the export tool) the stored rows are left alone.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version
+        # sqlite3 connections must not be shared across threads; FastAPI runs
+        # sync endpoints in a thread pool, so every thread gets its own.
+        self._local = threading.local()
+        self._pending_hits: Dict[str, Tuple[int, float]] = {}
+        self._pending_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._stop_flusher = threading.Event()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS solve_cache ("
+                " key TEXT PRIMARY KEY,"
+                " payload TEXT NOT NULL,"
+                " result TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0,"
+                " last_access REAL NOT NULL,"
+                " version TEXT NOT NULL DEFAULT '')"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(solve_cache)")]
+            if "version" not in columns:
+                conn.execute("ALTER TABLE solve_cache ADD COLUMN version TEXT NOT NULL DEFAULT ''")
+            conn.execute("CREATE INDEX IF NOT EXISTS solve_cache_last_access ON solve_cache (last_access)")
+            conn.execute("CREATE INDEX IF NOT EXISTS solve_cache_hits ON solve_cache (hits)")
+            # Running total of the stored bytes, kept up to date by triggers for all workers.
+            conn.execute("CREATE TABLE IF NOT EXISTS solve_cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO solve_cache_size VALUES (0, (SELECT COALESCE(SUM(size), 0) FROM solve_cache))")
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS solve_cache_size_insert AFTER INSERT ON solve_cache"
+                " BEGIN UPDATE solve_cache_size SET total = total + NEW.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS solve_cache_size_update AFTER UPDATE OF size ON solve_cache"
+                " BEGIN UPDATE solve_cache_size SET total = total + NEW.size - OLD.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS solve_cache_size_delete AFTER DELETE ON solve_cache"
+                " BEGIN UPDATE solve_cache_size SET total = total - OLD.size; END"
+            )
+            if version is not None:
+                conn.execute("DELETE FROM solve_cache WHERE version != ?", (version,))
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT result FROM solve_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._record_hit(key)
+        return json.loads(row[0])
+
+    def _record_hit(self, key: str):
+        now = time.time()
+        with self._pending_lock:
+            hits, _ = self._pending_hits.get(key, (0, now))
+            self._pending_hits[key] = (hits + 1, now)
+
+    def start_flusher(self):
+        """
+        Starts the background thread that writes the buffered hits every FLUSH_SECONDS.
+        """
+        if self._flusher is not None:
+            return
+        self._stop_flusher.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, name="solve-cache-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        stopping = False
+        while not stopping:
+            # Wakes up early at shutdown for a final flush.
+            stopping = self._stop_flusher.wait(self.FLUSH_SECONDS)
+            try:
+                self.flush_hits(timeout_ms=self.FLUSH_BUSY_TIMEOUT)
+            except sqlite3.Error:
+                pass  # Hit counts are only statistics; never let them kill the thread.
+        # The flusher owns its connection and closes it here.
+        self._close_connection()
+
+    def flush_hits(self, timeout_ms: Optional[int] = None):
+        """
+        Writes the buffered hit counts and access times. With timeout_ms set this
+        is best-effort: if another worker holds the write lock, the hits are kept
+        for the next flush.
+        """
+        with self._pending_lock:
+            pending, self._pending_hits = self._pending_hits, {}
+        if not pending:
+            return
+        conn = self._connection()
+        if timeout_ms is not None:
+            conn.execute(f"PRAGMA busy_timeout = {int(timeout_ms)}")
+        try:
+            with conn:
+                conn.executemany(
+                    "UPDATE solve_cache SET hits = hits + ?, last_access = MAX(last_access, ?) WHERE key = ?",
+                    [(hits, last_access, key) for key, (hits, last_access) in pending.items()],
+                )
+        except sqlite3.OperationalError:
+            with self._pending_lock:
+                for key, (hits, last_access) in pending.items():
+                    newer_hits, newer_access = self._pending_hits.get(key, (0, last_access))
+                    self._pending_hits[key] = (hits + newer_hits, max(last_access, newer_access))
+        finally:
+            if timeout_ms is not None:
+                conn.execute("PRAGMA busy_timeout = 30000")
+
+    def contains(self, key: str) -> bool:
+        row = self._connection().execute("SELECT 1 FROM solve_cache WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    def put(self, key: str, payload: Dict[str, Any], result: Dict[str, Any]):
+        """
+        Stores a result. Best-effort: if the database stays locked, the result
+        is simply not cached.
+        """
+        encoded_payload = json.dumps(payload)
+        encoded = json.dumps(result)
+        size = len(encoded_payload) + len(encoded)
+        if size > self.max_bytes * self.EVICT_TARGET:
+            return  # Would evict everything else and still not fit.
+        conn = self._connection()
+        try:
+            with conn:
+                # Keep the hit count if another worker stored the same circuit meanwhile.
+                conn.execute(
+                    "INSERT INTO solve_cache (key, payload, result, size, hits, last_access, version) VALUES (?, ?, ?, ?, 0, ?, ?)"
+                    " ON CONFLICT(key) DO UPDATE SET result = excluded.result, size = excluded.size, last_access = excluded.last_access",
+                    (key, encoded_payload, encoded, size, time.time(), self.version or ""),
+                )
+                total = conn.execute("SELECT total FROM solve_cache_size").fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(conn)
+        except sqlite3.OperationalError:
+            return
+
+    def _evict(self, conn: sqlite3.Connection):
+        """
+        Deletes the least recently used entries until the store is back under
+        EVICT_TARGET * max_bytes.
+        """
+        conn.execute(
+            "DELETE FROM solve_cache WHERE key IN ("
+            " SELECT key FROM ("
+            "  SELECT key, SUM(size) OVER (ORDER BY last_access DESC, key) AS running FROM solve_cache"
+            " ) WHERE running > ?)",
+            (int(self.max_bytes * self.EVICT_TARGET),),
+        )
+
+    def most_frequent(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Returns the request payloads of the most requested circuits, e.g. to
+        write a seed file for the next deploy.
+        """
+        self.flush_hits()
+        rows = self._connection().execute(
+            "SELECT payload FROM solve_cache ORDER BY hits DESC, last_access DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        """
+        Stops the flusher (which writes the remaining hits) and closes this thread's connection.
+        """
+        if self._flusher is not None:
+            self._stop_flusher.set()
+            self._flusher.join()
+            self._flusher = None
+        else:
+            self.flush_hits(timeout_ms=self.FLUSH_BUSY_TIMEOUT)
+        self._close_connection()
+
+    def _close_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# Export the most frequent circuits as a seed file for warm startup
+# ("-" writes to stdout, e.g. to copy it from a remote shell):
+#   python solve_cache.py solve_cache.sqlite3 cache_seed.json [limit]
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python solve_cache.py <cache.sqlite3> <seed.json|-> [limit]")
+        sys.exit(1)
+    limit = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    payloads = SolveCache(sys.argv[1]).most_frequent(limit)
+    if sys.argv[2] == "-":
+        json.dump(payloads, sys.stdout, indent=2)
+        sys.exit(0)
+    with open(sys.argv[2], "w", encoding="utf-8") as f:
+        json.dump(payloads, f, indent=2)
+    print(f"{len(payloads)} Schaltungen nach {sys.argv[2]} exportiert.")
@@ -0,0 +1,76 @@
+import math
+
+import pytest
+
+from circuit_solver import SelfHeatingCircuitSolver, solve_mixed_circuit, solve_self_heating_circuit
+
+
+def test_single_resistor_matches_analytic_fixed_point():
+    # R = R0 * (1 + α * θ * V²/R)  =>  R² - R0·R - k·V² = 0 with k = R0·α·θ
+    r0, tcr, theta, voltage = 100.0, 0.004, 50.0, 40.0
+    k = r0 * tcr * theta
+    expected = (r0 + math.sqrt(r0 ** 2 + 4 * k * voltage ** 2)) / 2
+
+    result = solve_self_heating_circuit(
+        {"type": "series", "components": [{"value": r0, "tcr": tcr, "thermal_resistance": theta}]}, [voltage]
+    )[0]
+
+    assert result["converged"] and not result["runaway"]
+    assert result["total_resistance"] == pytest.approx(expected, rel=1e-9)
+    assert result["individual_results"][0]["temperature_rise"] == pytest.approx(theta * voltage ** 2 / expected, rel=1e-9)
+
+
+def test_without_thermal_parameters_matches_mixed_solver():
+    circuit = {"type": "series", "components": [10, {"type": "parallel", "components": [20, 50, {"type": "series", "components": [1, 2]}]}, 5]}
+    plain = solve_mixed_circuit(circuit, 12)
+    heated = solve_self_heating_circuit(circuit, [12])[0]
+
+    assert heated["converged"] and heated["iterations"] == 1
+    assert heated["total_resistance"] == pytest.approx(plain["total_resistance"])
+    for a, b in zip(plain["individual_results"], heated["individual_results"]):
+        assert (a["resistor"], a["power"]) == (b["resistor"], pytest.approx(b["power"]))
+
+
+def test_ntc_runaway_is_reported_with_physical_values():
+    circuit = {"type": "series", "components": [{"value": 10, "tcr": -0.05, "thermal_resistance": 100}, 1]}
+    result = solve_self_heating_circuit(circuit, [12])[0]
+
+    assert result["runaway"] and not result["converged"]
+    assert all(r["resistance"] > 0 and r["power"] >= 0 for r in result["individual_results"])
+
+
+def test_small_resistor_is_held_to_relative_tolerance():
+    circuit = {"type": "series", "components": [
+        {"value": 1000, "tcr": 0.004, "thermal_resistance": 20},
+        {"value": 0.001, "tcr": 0.004, "thermal_resistance": 2000},
+    ]}
+    tolerance = 1e-9
+    result = solve_self_heating_circuit(circuit, [100], tolerance=tolerance)[0]
+
+    assert result["converged"]
+    current = result["total_current"]
+    for r, spec in zip(result["individual_results"], circuit["components"]):
+        fixed_point = spec["value"] * (1 + spec["tcr"] * spec["thermal_resistance"] * r["resistance"] * current ** 2)
+        assert r["resistance"] == pytest.approx(fixed_point, rel=10 * tolerance)
+
+
+def test_iteration_limit_reports_last_evaluated_iterate():
+    circuit = {"type": "parallel", "components": [{"value": 10, "tcr": 0.004, "thermal_resistance": 80}, 40]}
+    result = SelfHeatingCircuitSolver(max_iterations=2).solve(circuit, [30])[0]
+
+    assert not result["converged"] and result["iterations"] == 2
+    assert result["total_resistance"] == result["telemetry"][-1]["total_resistance"]
+
+
+def test_sweep_warm_starts_and_converges():
+    circuit = {"type": "series", "components": [{"value": 100, "tcr": 0.004, "thermal_resistance": 50}, 20]}
+    results = solve_self_heating_circuit(circuit, [5, 10, 20, 40])
+
+    assert [r["total_voltage"] for r in results] == [5, 10, 20, 40]
+    assert all(r["converged"] for r in results)
+    assert [r["total_resistance"] for r in results] == sorted(r["total_resistance"] for r in results)
+
+
+def test_empty_group_is_rejected():
+    with pytest.raises(ValueError):
+        solve_self_heating_circuit({"type": "series", "components": [1, {"type": "parallel", "components": []}]}, [5])
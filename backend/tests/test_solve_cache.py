@@ -0,0 +1,72 @@
+import sqlite3
+import time
+
+from solve_cache import SolveCache, circuit_hash
+
+
+def _rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT key, hits, size, length(payload) + length(result) FROM solve_cache").fetchall()
+
+
+def test_equivalent_payloads_share_a_key_per_version():
+    a = {"circuit_type": "mixed", "circuit": {"type": "series", "components": [10, 20.0]}, "total_voltage": 12}
+    b = {"total_voltage": 12.0, "circuit_type": "mixed", "circuit": {"components": [10.0, 20], "type": "series"}}
+
+    assert circuit_hash(a, "1") == circuit_hash(b, "1")
+    assert circuit_hash(a, "1") != circuit_hash(a, "2")
+
+
+def test_eviction_bounds_payload_and_result_bytes(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SolveCache(path, max_bytes=20000, version="1")
+    for i in range(100):
+        cache.put(str(i), {"payload": "p" * 500}, {"result": "r" * 500})
+    cache.close()
+
+    rows = _rows(path)
+    assert all(size == stored for _, _, size, stored in rows)
+    assert sum(size for _, _, size, _ in rows) <= 20000
+    # The most recently stored entries survive.
+    assert "99" in {key for key, _, _, _ in rows}
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT total FROM solve_cache_size").fetchone()[0] == sum(size for _, _, size, _ in rows)
+
+
+def test_rows_of_other_versions_are_dropped(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    old = SolveCache(path, version="1")
+    old.put("a", {}, {"x": 1})
+    old.close()
+
+    assert SolveCache(path, version="1").get("a") == {"x": 1}
+    assert SolveCache(path, version="2").get("a") is None
+
+
+def test_get_does_not_write_and_flusher_records_hits(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SolveCache(path, version="1")
+    cache.put("a", {}, {"x": 1})
+
+    # A write lock held by another worker must not block a hit.
+    other = sqlite3.connect(path)
+    other.execute("BEGIN IMMEDIATE")
+    started = time.time()
+    assert cache.get("a") == {"x": 1}
+    assert time.time() - started < 1
+    other.rollback()
+    other.close()
+    assert _rows(path)[0][1] == 0
+
+    cache.FLUSH_SECONDS = 0.05
+    cache.start_flusher()
+    cache.get("a")
+    deadline = time.time() + 5
+    while _rows(path)[0][1] < 2 and time.time() < deadline:
+        time.sleep(0.05)
+    assert _rows(path)[0][1] == 2
+
+    # Hits recorded right before shutdown are written by close().
+    cache.get("a")
+    cache.close()
+    assert _rows(path)[0][1] == 3